@@ -4,7 +4,10 @@ C-test grading module for C-test Intake App.
 Provides proper C-test grading based on exact matches with answer keys.
 """
 
-from typing import Dict, List, Tuple
+import sys
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
 from models import CTestItem
 
 # Spelling variants (British/American)
@@ -42,6 +45,54 @@ SPELLING_VARIANTS = {
     "fulfil": "fulfill",
 }
 
+# Accepted (student, correct) pairs in both directions, for O(1) variant lookup.
+# Strings are casefolded like normalized answers, and interned so probes with
+# interned answers compare by identity.
+VARIANT_PAIRS = frozenset(
+    (sys.intern(a.casefold()), sys.intern(b.casefold()))
+    for variant, standard in SPELLING_VARIANTS.items()
+    for a, b in ((variant, standard), (standard, variant))
+)
+
+# Feedback separator lines
+_SEP = "=" * 50
+_RULE = "-" * 50
+
+# Minimum percentage for scores 1-5 (same as C_TEST_SCORE_THRESHOLDS in config)
+SCORE_THRESHOLDS = (30, 45, 60, 75, 90)
+
+# Score for each whole percentage 0-100; the thresholds are whole numbers,
+# so truncating a percentage never changes its score
+_PERCENT_TO_SCORE = bytes(bisect_right(SCORE_THRESHOLDS, p) for p in range(101))
+
+
+@lru_cache(maxsize=4096)
+def _check_answer_cached(student_answer: str, correct: str, accept_variants: bool) -> bool:
+    """
+    Cached answer check shared by all graders.
+    
+    Safe to cache because SPELLING_VARIANTS is fixed at import time.
+    
+    Args:
+        student_answer: The student's answer
+        correct: The correct answer, already normalized
+        accept_variants: If True, accept British/American spelling variants
+    
+    Returns:
+        True if the answer is correct, False otherwise
+    """
+    student = sys.intern(student_answer.strip().casefold())
+    
+    # Direct match
+    if student == correct:
+        return True
+    
+    # Check spelling variants if enabled
+    if accept_variants:
+        return (student, correct) in VARIANT_PAIRS
+    
+    return False
+
 
 class CTestGrader:
     """Grades C-test submissions based on exact match with answer key."""
@@ -56,6 +107,11 @@ class CTestGrader:
         """
         self.answer_key = answer_key
         self.accept_variants = accept_variants
+        
+        # Normalized once here so repeated submissions don't redo it
+        self.answer_key_norm = {
+            n: sys.intern(w.strip().casefold()) for n, w in answer_key.items()
+        }
     
     def grade_submission(self, student_answers: Dict[int, str]) -> Tuple[int, List[CTestItem], str]:
         """
@@ -70,26 +126,13 @@ class CTestGrader:
             - items is a list of CTestItem objects with grading details
             - feedback is a string with detailed grading explanation
         """
-        items = []
-        num_correct = 0
-        
-        # Grade each item
-        for item_num, correct_answer in self.answer_key.items():
-            student_answer = student_answers.get(item_num, "")
-            is_correct = self._check_answer(student_answer, correct_answer)
-            
-            if is_correct:
-                num_correct += 1
-            
-            # Create item result
-            item = CTestItem(
-                item_number=item_num,
-                original_word=correct_answer,
-                fragment_shown="",  # Not needed for grading
-                student_answer=student_answer,
-                is_correct=is_correct
-            )
-            items.append(item)
+        # Grade each item (fragment_shown is not needed for grading)
+        answer_key = self.answer_key
+        items = [
+            CTestItem(item_num, answer_key[item_num], "", student_answer, is_correct)
+            for item_num, student_answer, is_correct in self._iter_matches(student_answers)
+        ]
+        num_correct = sum(item.is_correct for item in items)
         
         # Calculate percentage and score
         total_items = len(self.answer_key)
@@ -101,41 +144,51 @@ class CTestGrader:
         
         return score, items, feedback
     
-    def _check_answer(self, student_answer: str, correct_answer: str) -> bool:
+    def score_only(self, student_answers: Dict[int, str]) -> int:
+        """
+        Score a C-test submission without building item details or feedback.
+        
+        Args:
+            student_answers: Dictionary mapping item numbers to student answers
+        
+        Returns:
+            Score from 0 to 5
+        """
+        num_correct = sum(is_correct for _, _, is_correct in self._iter_matches(student_answers))
+        total_items = len(self.answer_key)
+        percentage = (num_correct / total_items * 100) if total_items > 0 else 0
+        return self._percentage_to_score(percentage)
+    
+    def _iter_matches(self, student_answers: Dict[int, str]) -> Iterator[Tuple[int, str, bool]]:
+        """
+        Check each answer key item against the submission.
+        
+        Args:
+            student_answers: Dictionary mapping item numbers to student answers
+        
+        Yields:
+            Tuples of (item_number, student_answer, is_correct)
+        """
+        for item_num, correct in self.answer_key_norm.items():
+            student_answer = student_answers.get(item_num, "")
+            yield item_num, student_answer, self._check_answer(student_answer, correct)
+    
+    def _check_answer(self, student_answer: str, correct: str) -> bool:
         """
         Check if a student answer matches the correct answer.
         
         Args:
             student_answer: The student's answer
-            correct_answer: The correct answer
+            correct: The correct answer, already normalized (see answer_key_norm)
         
         Returns:
             True if the answer is correct, False otherwise
         """
-        # Normalize both answers
-        student = student_answer.strip().lower()
-        correct = correct_answer.strip().lower()
-        
-        # Direct match
-        if student == correct:
+        # Fast path: already identical to the normalized key, nothing to normalize
+        if student_answer == correct:
             return True
         
-        # Check spelling variants if enabled
-        if self.accept_variants:
-            # Check if student used variant of correct answer
-            if student in SPELLING_VARIANTS and SPELLING_VARIANTS[student] == correct:
-                return True
-            if correct in SPELLING_VARIANTS and SPELLING_VARIANTS[correct] == student:
-                return True
-            
-            # Reverse check - if correct answer is a variant key
-            for variant, standard in SPELLING_VARIANTS.items():
-                if correct == variant and student == standard:
-                    return True
-                if correct == standard and student == variant:
-                    return True
-        
-        return False
+        return _check_answer_cached(student_answer, correct, self.accept_variants)
     
     def _percentage_to_score(self, percentage: float) -> int:
         """
@@ -147,18 +200,7 @@ class CTestGrader:
         Returns:
             Score from 0 to 5
         """
-        if percentage >= 90:
-            return 5
-        elif percentage >= 75:
-            return 4
-        elif percentage >= 60:
-            return 3
-        elif percentage >= 45:
-            return 2
-        elif percentage >= 30:
-            return 1
-        else:
-            return 0
+        return _PERCENT_TO_SCORE[min(max(int(percentage), 0), 100)]
     
     def _generate_feedback(self, num_correct: int, total_items: int, 
                           percentage: float, score: int, items: List[CTestItem]) -> str:
@@ -175,24 +217,25 @@ class CTestGrader:
         Returns:
             Formatted feedback string
         """
-        lines = [
+        header = [
             f"C-test Grading Results",
-            f"=" * 50,
+            _SEP,
             f"Correct answers: {num_correct}/{total_items}",
             f"Percentage: {percentage:.1f}%",
             f"Score: {score}/5",
             f"",
             f"Item-by-Item Results:",
-            f"-" * 50,
+            _RULE,
         ]
+        offset = len(header)
+        lines = header + [None] * len(items)
         
         # Add individual item results
-        for item in items:
-            status = "✓" if item.is_correct else "✗"
-            if item.is_correct:
-                lines.append(f"{status} Item {item.item_number}: '{item.student_answer}' - Correct")
-            else:
-                lines.append(f"{status} Item {item.item_number}: '{item.student_answer}' - Expected: '{item.original_word}'")
+        for i, item in enumerate(items, start=offset):
+            lines[i] = (
+                f"{'✓' if item.is_correct else '✗'} Item {item.item_number}: '{item.student_answer}'"
+                + (" - Correct" if item.is_correct else f" - Expected: '{item.original_word}'")
+            )
         
         return "\n".join(lines)
 
@@ -212,3 +255,40 @@ def grade_c_test(answer_key: Dict[int, str], student_answers: Dict[int, str],
     """
     grader = CTestGrader(answer_key, accept_variants)
     return grader.grade_submission(student_answers)
+
+
+def grade_batch(answer_key: Dict[int, str], submissions: List[Dict[int, str]],
+                accept_variants: bool = True) -> List[Tuple[int, List[CTestItem], str]]:
+    """
+    Grade many submissions against the same answer key.
+    
+    A single grader is shared across the batch so the answer key is
+    normalized once and repeated answers hit the answer-check cache.
+    
+    Args:
+        answer_key: Dictionary mapping item numbers to correct answers
+        submissions: List of student answer dictionaries
+        accept_variants: If True, accept British/American spelling variants
+    
+    Returns:
+        List of (score, items, feedback) tuples, in submission order
+    """
+    grader = CTestGrader(answer_key, accept_variants)
+    return [grader.grade_submission(answers) for answers in submissions]
+
+
+def score_batch(answer_key: Dict[int, str], submissions: List[Dict[int, str]],
+                accept_variants: bool = True) -> List[int]:
+    """
+    Score many submissions against the same answer key, scores only.
+    
+    Args:
+        answer_key: Dictionary mapping item numbers to correct answers
+        submissions: List of student answer dictionaries
+        accept_variants: If True, accept British/American spelling variants
+    
+    Returns:
+        List of scores (0-5), in submission order
+    """
+    grader = CTestGrader(answer_key, accept_variants)
+    return [grader.score_only(answers) for answers in submissions]
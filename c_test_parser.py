@@ -4,9 +4,19 @@ C-test answer parser for C-test Intake App.
 Extracts student answers from various submission formats.
 """
 
+import itertools
 import re
 from typing import Dict
 
+# Numbered list entry at the start of a line: "1. word" or "1) word"
+_NUMBERED_RE = re.compile(r'^\s*(\d+)[.\)][^\S\r\n]*([a-zA-Z]+)', re.MULTILINE)
+
+# Bracketed completion: "wea[weather]"
+_BRACKET_RE = re.compile(r'\[([a-zA-Z]+)\]')
+
+# Blank in a template: "wea____"
+_FRAGMENT_RE = re.compile(r'___+')
+
 
 def extract_c_test_answers(text: str, num_items: int) -> Dict[int, str]:
     """
@@ -58,18 +68,10 @@ def _parse_numbered_list(text: str, num_items: int) -> Dict[int, str]:
     """
     answers = {}
     
-    # Pattern matches: "1. word" or "1) word" or "1 word"
-    # Captures number and word
-    pattern = r'^\s*(\d+)[\.\)]\s*([a-zA-Z]+)'
-    
-    lines = text.split('\n')
-    for line in lines:
-        match = re.match(pattern, line.strip())
-        if match:
-            item_num = int(match.group(1))
-            answer = match.group(2).strip()
-            if 1 <= item_num <= num_items:
-                answers[item_num] = answer
+    for match in _NUMBERED_RE.finditer(text):
+        item_num = int(match.group(1))
+        if 1 <= item_num <= num_items:
+            answers[item_num] = match.group(2)
     
     # Only return if we found a reasonable number of answers
     if len(answers) >= num_items / 2:  # At least half
@@ -92,16 +94,9 @@ def _parse_bracket_format(text: str, num_items: int) -> Dict[int, str]:
     Returns:
         Dictionary of answers or empty dict if not this format
     """
-    answers = {}
-    
-    # Pattern matches: [word] or (word)
-    pattern = r'\[([a-zA-Z]+)\]'
-    
-    matches = re.findall(pattern, text)
-    
-    for i, match in enumerate(matches, start=1):
-        if i <= num_items:
-            answers[i] = match.strip()
+    # Stop scanning once num_items brackets have been found
+    matches = itertools.islice(_BRACKET_RE.finditer(text), max(num_items, 0))
+    answers = {i: match.group(1) for i, match in enumerate(matches, start=1)}
     
     # Only return if we found a reasonable number of answers
     if len(answers) >= num_items / 2:  # At least half
@@ -127,8 +122,7 @@ def parse_c_test_with_template(text: str, template: str) -> Dict[int, str]:
         Dictionary mapping item numbers to answers
     """
     # First try to count fragments in template
-    fragment_pattern = r'___+'
-    fragments = re.findall(fragment_pattern, template)
+    fragments = _FRAGMENT_RE.findall(template)
     num_items = len(fragments)
     
     # Try to extract answers
@@ -145,7 +139,7 @@ def normalize_answer(answer: str) -> str:
     Returns:
         Normalized answer
     """
-    return answer.strip().lower()
+    return answer.strip().casefold()
 
 
 def validate_answers(answers: Dict[int, str], num_items: int) -> bool:
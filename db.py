@@ -4,13 +4,19 @@ SQLite database layer for C-Test Intake App.
 Local database for C-test results and templates.
 """
 
+import atexit
+import calendar
 import sqlite3
+import threading
+from collections import defaultdict
 from contextlib import contextmanager
-from datetime import datetime
+from dataclasses import replace
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Generator, Dict
+from typing import List, NamedTuple, Optional, Generator, Dict, Tuple, Union
 
 from config import DB_PATH
+from db_connections import ThreadConnections
 from models import CTestItem, CTestResult, Student
 
 
@@ -24,7 +30,7 @@ CREATE TABLE IF NOT EXISTS c_test_results (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     student_id TEXT NOT NULL,
     test_version TEXT NOT NULL,
-    test_date TEXT NOT NULL,
+    test_date INTEGER NOT NULL,  -- Unix seconds; naive values are UTC wall clock
     num_items INTEGER NOT NULL,
     num_correct INTEGER NOT NULL,
     percentage REAL NOT NULL,
@@ -46,6 +52,17 @@ CREATE TABLE IF NOT EXISTS c_test_result_items (
     FOREIGN KEY (result_id) REFERENCES c_test_results(id) ON DELETE CASCADE
 );
 
+-- Index for loading a result's items in order
+CREATE INDEX IF NOT EXISTS idx_c_test_items_result
+ON c_test_result_items(result_id, item_number);
+
+-- Index for a student's results; scanned backwards it yields newest
+-- first with id breaking ties. Replaces an earlier test_date DESC index
+-- that could not serve the id tie-break.
+DROP INDEX IF EXISTS idx_c_test_student_date;
+CREATE INDEX IF NOT EXISTS idx_c_test_results_student
+ON c_test_results(student_id, test_date);
+
 -- C-test templates/versions
 CREATE TABLE IF NOT EXISTS c_test_templates (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -66,8 +83,214 @@ CREATE TABLE IF NOT EXISTS students_cache (
     qr_code TEXT,
     last_synced TEXT DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Index for listing cached students by name
+CREATE INDEX IF NOT EXISTS idx_students_cache_name
+ON students_cache(last_name, first_name);
+"""
+
+# Connection tuning: NORMAL sync is safe under WAL while avoiding an fsync on
+# every commit; busy_timeout waits out other writers instead of failing
+PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+PRAGMA busy_timeout=5000;
+PRAGMA foreign_keys=ON;
+"""
+
+# Run as each connection closes: refreshes planner statistics for the tables
+# its queries used, with a bounded sample so closing stays quick
+CLOSE_PRAGMAS = """
+PRAGMA analysis_limit=400;
+PRAGMA optimize;
 """
 
+# Stay below SQLite's default limit on bound parameters per statement
+MAX_SQL_VARIABLES = 900
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+# Kept as module constants so every call passes the same string object and
+# hits the connection's prepared-statement cache.
+
+# Only touches ISO strings SQLite can parse, so it is safe to run on every
+# startup; anything else is left as text for _from_timestamp to report
+SQL_MIGRATE_TEST_DATES = """UPDATE c_test_results
+    SET test_date = CAST(strftime('%s', test_date) AS INTEGER)
+    WHERE typeof(test_date) = 'text' AND test_date LIKE '____-__-__%'
+      AND strftime('%s', test_date) IS NOT NULL"""
+
+# SQLite 3.35+ hands back new row IDs from the INSERT itself
+RETURNING_ID = " RETURNING id" if sqlite3.sqlite_version_info >= (3, 35, 0) else ""
+
+SQL_INSERT_RESULT = """INSERT INTO c_test_results
+    (student_id, test_version, test_date, num_items, num_correct,
+     percentage, score, placement_level, completed, synced_to_inventory)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""" + RETURNING_ID
+
+SQL_INSERT_ITEM = """INSERT INTO c_test_result_items
+    (result_id, item_number, correct_word, student_answer, is_correct)
+    VALUES (?, ?, ?, ?, ?)"""
+
+SQL_SELECT_RESULT = "SELECT * FROM c_test_results WHERE id = ?"
+
+SQL_SELECT_ITEMS = """SELECT item_number, correct_word, student_answer, is_correct
+    FROM c_test_result_items
+    WHERE result_id = ? ORDER BY item_number"""
+
+# Same rows as SQL_SELECT_ITEMS with NULL answers blanked in SQL, for lite reads
+SQL_SELECT_ITEMS_LITE = """SELECT item_number, correct_word,
+           COALESCE(student_answer, ''), is_correct
+    FROM c_test_result_items
+    WHERE result_id = ? ORDER BY item_number"""
+
+# test_date has whole-second precision, so id breaks ties within a second
+SQL_SELECT_STUDENT_RESULTS = """SELECT * FROM c_test_results
+    WHERE student_id = ?
+    ORDER BY test_date DESC, id DESC"""
+
+# Formatted with one "?" per result ID
+SQL_SELECT_ITEMS_FOR_RESULTS = """SELECT result_id, item_number, correct_word, student_answer, is_correct
+    FROM c_test_result_items
+    WHERE result_id IN ({placeholders})
+    ORDER BY result_id, item_number"""
+
+SQL_MARK_RESULT_SYNCED = "UPDATE c_test_results SET synced_to_inventory = 1 WHERE id = ?"
+
+SQL_INSERT_TEMPLATE = """INSERT INTO c_test_templates
+    (version, text_with_fragments, answer_key, num_items)
+    VALUES (?, ?, ?, ?)""" + RETURNING_ID
+
+SQL_SELECT_TEMPLATE = "SELECT * FROM c_test_templates WHERE version = ?"
+
+SQL_LIST_TEMPLATES = "SELECT version, num_items FROM c_test_templates ORDER BY version"
+
+SQL_UPSERT_STUDENT = """INSERT OR REPLACE INTO students_cache
+    (student_id, first_name, last_name, level, status, qr_code, last_synced)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+SQL_SELECT_STUDENT = "SELECT * FROM students_cache WHERE student_id = ?"
+
+SQL_SELECT_ALL_STUDENTS = "SELECT * FROM students_cache ORDER BY last_name, first_name"
+
+
+class TemplateInfo(NamedTuple):
+    """Summary of a C-test template, as listed by list_c_test_templates()."""
+    version: str
+    num_items: int
+
+
+class CTestResultLite(NamedTuple):
+    """
+    Read-only C-test result for summaries and stats.
+    
+    Items are plain (item_number, correct_word, student_answer, is_correct)
+    tuples straight from the database, with is_correct as 0/1.
+    """
+    id: int
+    student_id: str
+    test_version: str
+    test_date: Optional[datetime]
+    num_items: int
+    num_correct: int
+    percentage: float
+    score: int
+    placement_level: str
+    items: List[Tuple[int, str, str, int]]
+
+
+# =============================================================================
+# ROW CONVERSION
+# =============================================================================
+
+def _tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor returning plain tuples, for bulk item reads."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def _inserted_id(cursor: sqlite3.Cursor) -> int:
+    """ID of the row just inserted by a statement ending in RETURNING_ID."""
+    if RETURNING_ID:
+        return cursor.fetchone()[0]
+    return cursor.lastrowid
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[int]:
+    """
+    Convert a datetime to integer Unix seconds.
+    
+    Naive values are treated as UTC wall-clock time; aware values are
+    converted to UTC, matching what SQL_MIGRATE_TEST_DATES does for ISO
+    strings with offsets. The offset itself is not stored.
+    """
+    return calendar.timegm(value.utctimetuple()) if value else None
+
+
+def _from_timestamp(value) -> Optional[datetime]:
+    """Inverse of _to_timestamp, returning naive UTC; also accepts digit strings."""
+    if value is None or value == "":
+        return None
+    return datetime.fromtimestamp(int(value), timezone.utc).replace(tzinfo=None)
+
+
+def _item_from_row(number: int, word: str, answer: Optional[str], correct: int) -> CTestItem:
+    """Build a CTestItem from an item tuple; a NULL answer reads as blank."""
+    return CTestItem(number, word, "", answer or "", bool(correct))
+
+
+def _row_to_result(row: sqlite3.Row, items: List[CTestItem]) -> CTestResult:
+    """Build a CTestResult from a c_test_results row and its items."""
+    test_date = _from_timestamp(row["test_date"])
+    
+    return CTestResult(
+        id=row["id"],
+        student_id=row["student_id"],
+        test_version=row["test_version"],
+        test_date=test_date,
+        num_items=row["num_items"],
+        num_correct=row["num_correct"],
+        percentage=row["percentage"],
+        score=row["score"],
+        placement_level=row["placement_level"] or "",
+        items=items,
+        completed=bool(row["completed"]),
+        synced_to_inventory=bool(row["synced_to_inventory"])
+    )
+
+
+def _row_to_result_lite(row: sqlite3.Row, items: List[Tuple[int, str, str, int]]) -> CTestResultLite:
+    """Build a CTestResultLite from a c_test_results row and raw item tuples."""
+    return CTestResultLite(
+        id=row["id"],
+        student_id=row["student_id"],
+        test_version=row["test_version"],
+        test_date=_from_timestamp(row["test_date"]),
+        num_items=row["num_items"],
+        num_correct=row["num_correct"],
+        percentage=row["percentage"],
+        score=row["score"],
+        placement_level=row["placement_level"] or "",
+        items=items
+    )
+
+
+def _row_to_student(row: sqlite3.Row) -> Student:
+    """Build a Student from a students_cache row."""
+    return Student(
+        student_id=row["student_id"],
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        level=row["level"] or "",
+        status=row["status"] or "active",
+        qr_code=row["qr_code"] or ""
+    )
+
 
 # =============================================================================
 # DATABASE CLASS
@@ -78,33 +301,119 @@ class Database:
     
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or DB_PATH
+        
+        # One long-lived connection per thread; _local tracks transaction depth
+        self._connections = ThreadConnections(
+            self.db_path, PRAGMAS, sqlite3.Row, close_script=CLOSE_PRAGMAS
+        )
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        
+        # Read-mostly lookups, invalidated by the matching writers. Writers
+        # bump the generation, so a reader whose row was read before a write
+        # committed cannot put it back into the cache afterwards.
+        self._template_cache: Dict[str, Dict] = {}
+        self._template_list_cache: Optional[List[TemplateInfo]] = None
+        self._student_cache: Dict[str, Student] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        
         self._init_db()
     
     def _init_db(self):
         """Create tables if they don't exist."""
         with self._connect() as conn:
             conn.executescript(SCHEMA)
+            # WAL lets reads run alongside writes; not available in memory
+            if str(self.db_path) != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            # Older databases stored test_date as ISO text (must follow the
+            # journal_mode switch, which cannot run inside a transaction)
+            conn.execute(SQL_MIGRATE_TEST_DATES)
         print(f"C-Test database initialized at {self.db_path}")
     
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get this thread's connection (dates are converted by _from_timestamp)."""
+        return self._connections.get()
+    
     @contextmanager
     def _connect(self) -> Generator[sqlite3.Connection, None, None]:
-        """Context manager for database connections."""
-        conn = None
+        """Context manager wrapping this thread's connection in a transaction."""
+        conn = self._get_conn()
+        
+        # Inside transaction(), the outer block commits or rolls back
+        if getattr(self._local, "tx_depth", 0):
+            yield conn
+            return
+        
+        # BaseException, so that e.g. KeyboardInterrupt cannot leave a half
+        # written transaction open for the thread's next commit
         try:
-            conn = sqlite3.connect(
-                self.db_path,
-                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
-            )
-            conn.row_factory = sqlite3.Row
             yield conn
             conn.commit()
-        except sqlite3.Error as e:
-            if conn:
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    @contextmanager
+    def transaction(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        Run several operations as one transaction.
+        
+        Database methods called inside the block join it instead of
+        committing on their own. Nested transaction() blocks join the
+        outermost one.
+        
+        Example:
+            with db.transaction():
+                result_id = db.add_c_test_result(result)
+                db.cache_student(student)
+        """
+        with self._write_lock:
+            conn = self._get_conn()
+            depth = getattr(self._local, "tx_depth", 0)
+            if depth:
+                self._local.tx_depth = depth + 1
+                try:
+                    yield conn
+                finally:
+                    self._local.tx_depth = depth
+                return
+            
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.tx_depth = 1
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
                 conn.rollback()
-            raise e
-        finally:
-            if conn:
-                conn.close()
+                raise
+            finally:
+                self._local.tx_depth = 0
+                # Other threads may have cached rows read before the commit
+                self._clear_caches()
+    
+    def _clear_caches(self) -> None:
+        """Drop all in-memory lookup caches."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._template_cache.clear()
+            self._template_list_cache = None
+            self._student_cache.clear()
+    
+    def _can_cache(self, generation: int) -> bool:
+        """
+        Check whether rows read at cache generation may be cached.
+        
+        Must be called with _cache_lock held. Rows read inside transaction()
+        may still be rolled back, so they are never cached.
+        """
+        return (generation == self._cache_generation
+                and not getattr(self._local, "tx_depth", 0))
+    
+    def close(self) -> None:
+        """Close all database connections."""
+        self._connections.close()
     
     # =========================================================================
     # C-TEST RESULT OPERATIONS
@@ -120,90 +429,80 @@ class Database:
         Returns:
             Result ID
         """
-        with self._connect() as conn:
+        with self._write_lock, self._connect() as conn:
+            # Take the write lock up front so result and items commit together
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            
             # Insert result
             cursor = conn.execute(
-                """INSERT INTO c_test_results
-                   (student_id, test_version, test_date, num_items, num_correct,
-                    percentage, score, placement_level, completed, synced_to_inventory)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                SQL_INSERT_RESULT,
                 (result.student_id, result.test_version, 
-                 result.test_date.isoformat() if result.test_date else None,
+                 _to_timestamp(result.test_date),
                  result.num_items, result.num_correct, result.percentage,
                  result.score, result.placement_level, result.completed,
                  result.synced_to_inventory)
             )
-            result_id = cursor.lastrowid
+            result_id = _inserted_id(cursor)
             
             # Insert items
-            for item in result.items:
-                conn.execute(
-                    """INSERT INTO c_test_result_items
-                       (result_id, item_number, correct_word, student_answer, is_correct)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (result_id, item.item_number, item.original_word,
-                     item.student_answer, item.is_correct)
-                )
+            self._insert_result_items(conn, result_id, result.items)
             
             return result_id
     
-    def get_c_test_result(self, result_id: int) -> Optional[CTestResult]:
+    def add_result_items(self, result_id: int, items: List[CTestItem]) -> None:
+        """
+        Add item-level details to an existing C-test result.
+        
+        Args:
+            result_id: Result ID
+            items: List of CTestItem objects
+        """
+        with self._write_lock, self._connect() as conn:
+            self._insert_result_items(conn, result_id, items)
+    
+    def _insert_result_items(self, conn: sqlite3.Connection, result_id: int,
+                             items: List[CTestItem]) -> None:
+        """Insert result items in one executemany call on an open connection."""
+        conn.executemany(
+            SQL_INSERT_ITEM,
+            [(result_id, item.item_number, item.original_word,
+              item.student_answer, item.is_correct)
+             for item in items]
+        )
+    
+    def get_c_test_result(self, result_id: int,
+                          lite: bool = False) -> Optional[Union[CTestResult, CTestResultLite]]:
         """
         Get a C-test result by ID.
         
         Args:
             result_id: Result ID
+            lite: If True, return a CTestResultLite with raw item tuples
+                instead of building CTestItem objects
             
         Returns:
-            CTestResult object or None
+            CTestResult (or CTestResultLite) object or None
         """
         with self._connect() as conn:
-            row = conn.execute(
-                "SELECT * FROM c_test_results WHERE id = ?", (result_id,)
-            ).fetchone()
+            row = conn.execute(SQL_SELECT_RESULT, (result_id,)).fetchone()
             
             if not row:
                 return None
             
-            # Get items
-            item_rows = conn.execute(
-                """SELECT * FROM c_test_result_items 
-                   WHERE result_id = ? ORDER BY item_number""",
-                (result_id,)
-            ).fetchall()
+            if lite:
+                items = _tuple_cursor(conn).execute(
+                    SQL_SELECT_ITEMS_LITE, (result_id,)
+                ).fetchall()
+                return _row_to_result_lite(row, items)
             
+            # Get items
             items = [
-                CTestItem(
-                    item_number=r["item_number"],
-                    original_word=r["correct_word"],
-                    fragment_shown="",
-                    student_answer=r["student_answer"] or "",
-                    is_correct=bool(r["is_correct"])
-                )
-                for r in item_rows
+                _item_from_row(*r)
+                for r in _tuple_cursor(conn).execute(SQL_SELECT_ITEMS, (result_id,))
             ]
             
-            test_date = None
-            if row["test_date"]:
-                if isinstance(row["test_date"], str):
-                    test_date = datetime.fromisoformat(row["test_date"])
-                else:
-                    test_date = row["test_date"]
-            
-            return CTestResult(
-                id=row["id"],
-                student_id=row["student_id"],
-                test_version=row["test_version"],
-                test_date=test_date,
-                num_items=row["num_items"],
-                num_correct=row["num_correct"],
-                percentage=row["percentage"],
-                score=row["score"],
-                placement_level=row["placement_level"] or "",
-                items=items,
-                completed=bool(row["completed"]),
-                synced_to_inventory=bool(row["synced_to_inventory"])
-            )
+            return _row_to_result(row, items)
     
     def get_student_results(self, student_id: int) -> List[CTestResult]:
         """
@@ -216,22 +515,27 @@ class Database:
             List of CTestResult objects
         """
         with self._connect() as conn:
-            rows = conn.execute(
-                """SELECT id FROM c_test_results 
-                   WHERE student_id = ? 
-                   ORDER BY test_date DESC""",
-                (student_id,)
-            ).fetchall()
+            rows = conn.execute(SQL_SELECT_STUDENT_RESULTS, (student_id,)).fetchall()
+            
+            # Load items for all results at once, chunked under SQLite's variable limit
+            items_by_result: Dict[int, List[CTestItem]] = defaultdict(list)
+            ids = [row["id"] for row in rows]
+            for start in range(0, len(ids), MAX_SQL_VARIABLES):
+                chunk = ids[start:start + MAX_SQL_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                item_rows = _tuple_cursor(conn).execute(
+                    SQL_SELECT_ITEMS_FOR_RESULTS.format(placeholders=placeholders),
+                    chunk
+                )
+                for rid, *r in item_rows:
+                    items_by_result[rid].append(_item_from_row(*r))
             
-            return [self.get_c_test_result(row["id"]) for row in rows]
+            return [_row_to_result(row, items_by_result[row["id"]]) for row in rows]
     
     def mark_result_synced(self, result_id: int) -> None:
         """Mark a result as synced to inventory.db."""
-        with self._connect() as conn:
-            conn.execute(
-                "UPDATE c_test_results SET synced_to_inventory = 1 WHERE id = ?",
-                (result_id,)
-            )
+        with self._write_lock, self._connect() as conn:
+            conn.execute(SQL_MARK_RESULT_SYNCED, (result_id,))
     
     # =========================================================================
     # C-TEST TEMPLATE OPERATIONS
@@ -250,14 +554,18 @@ class Database:
         Returns:
             Template ID
         """
-        with self._connect() as conn:
-            cursor = conn.execute(
-                """INSERT INTO c_test_templates
-                   (version, text_with_fragments, answer_key, num_items)
-                   VALUES (?, ?, ?, ?)""",
-                (version, text, answer_key, num_items)
-            )
-            return cursor.lastrowid
+        with self._write_lock:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    SQL_INSERT_TEMPLATE,
+                    (version, text, answer_key, num_items)
+                )
+                template_id = _inserted_id(cursor)
+            with self._cache_lock:
+                self._cache_generation += 1
+                self._template_cache.pop(version, None)
+                self._template_list_cache = None
+            return template_id
     
     def get_c_test_template(self, version: str) -> Optional[Dict]:
         """
@@ -269,29 +577,42 @@ class Database:
         Returns:
             Dictionary with template data or None
         """
+        cached = self._template_cache.get(version)
+        if cached is not None:
+            return dict(cached)
+        
+        generation = self._cache_generation
         with self._connect() as conn:
-            row = conn.execute(
-                "SELECT * FROM c_test_templates WHERE version = ?",
-                (version,)
-            ).fetchone()
-            if row:
-                return {
-                    "id": row["id"],
-                    "version": row["version"],
-                    "text_with_fragments": row["text_with_fragments"],
-                    "answer_key": row["answer_key"],
-                    "num_items": row["num_items"],
-                    "created_at": row["created_at"],
-                }
+            row = conn.execute(SQL_SELECT_TEMPLATE, (version,)).fetchone()
+        
+        if not row:
             return None
+        
+        template = {
+            "id": row["id"],
+            "version": row["version"],
+            "text_with_fragments": row["text_with_fragments"],
+            "answer_key": row["answer_key"],
+            "num_items": row["num_items"],
+            "created_at": row["created_at"],
+        }
+        with self._cache_lock:
+            if self._can_cache(generation):
+                self._template_cache[version] = template
+        return dict(template)
     
-    def list_c_test_templates(self) -> List[Dict]:
-        """List all available C-test templates."""
-        with self._connect() as conn:
-            rows = conn.execute(
-                "SELECT version, num_items FROM c_test_templates ORDER BY version"
-            ).fetchall()
-            return [{"version": r["version"], "num_items": r["num_items"]} for r in rows]
+    def list_c_test_templates(self) -> List[TemplateInfo]:
+        """List all available C-test templates as (version, num_items) tuples."""
+        cached = self._template_list_cache
+        if cached is None:
+            generation = self._cache_generation
+            with self._connect() as conn:
+                rows = _tuple_cursor(conn).execute(SQL_LIST_TEMPLATES)
+                cached = [TemplateInfo._make(r) for r in rows]
+            with self._cache_lock:
+                if self._can_cache(generation):
+                    self._template_list_cache = cached
+        return list(cached)
     
     # =========================================================================
     # STUDENT CACHE OPERATIONS
@@ -299,52 +620,56 @@ class Database:
     
     def cache_student(self, student: Student) -> None:
         """Cache a student from inventory.db."""
-        with self._connect() as conn:
-            conn.execute(
-                """INSERT OR REPLACE INTO students_cache
-                   (student_id, first_name, last_name, level, status, qr_code, last_synced)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (student.student_id, student.first_name, student.last_name,
-                 student.level, student.status, student.qr_code, 
-                 datetime.now().isoformat())
-            )
+        self.bulk_cache_students([student])
+    
+    def bulk_cache_students(self, students: List[Student]) -> None:
+        """
+        Cache many students from inventory.db in one statement.
+        
+        All rows share a single last_synced timestamp.
+        
+        Args:
+            students: List of Student objects
+        """
+        last_synced = datetime.now().isoformat()
+        with self._write_lock:
+            with self._connect() as conn:
+                conn.executemany(
+                    SQL_UPSERT_STUDENT,
+                    [(s.student_id, s.first_name, s.last_name,
+                      s.level, s.status, s.qr_code, last_synced)
+                     for s in students]
+                )
+            with self._cache_lock:
+                self._cache_generation += 1
+                for s in students:
+                    self._student_cache.pop(s.student_id, None)
     
     def get_cached_student(self, student_id: str) -> Optional[Student]:
         """Get a cached student."""
+        cached = self._student_cache.get(student_id)
+        if cached is not None:
+            return replace(cached)
+        
+        generation = self._cache_generation
         with self._connect() as conn:
-            row = conn.execute(
-                "SELECT * FROM students_cache WHERE student_id = ?", (student_id,)
-            ).fetchone()
-            
-            if row:
-                return Student(
-                    student_id=row["student_id"],
-                    first_name=row["first_name"],
-                    last_name=row["last_name"],
-                    level=row["level"] or "",
-                    status=row["status"] or "active",
-                    qr_code=row["qr_code"] or ""
-                )
+            row = conn.execute(SQL_SELECT_STUDENT, (student_id,)).fetchone()
+        
+        if not row:
             return None
+        
+        student = _row_to_student(row)
+        with self._cache_lock:
+            if self._can_cache(generation):
+                self._student_cache[student_id] = student
+        return replace(student)
     
     def get_all_cached_students(self) -> List[Student]:
         """Get all cached students."""
         with self._connect() as conn:
-            rows = conn.execute(
-                "SELECT * FROM students_cache ORDER BY last_name, first_name"
-            ).fetchall()
+            rows = conn.execute(SQL_SELECT_ALL_STUDENTS).fetchall()
             
-            return [
-                Student(
-                    student_id=r["student_id"],
-                    first_name=r["first_name"],
-                    last_name=r["last_name"],
-                    level=r["level"] or "",
-                    status=r["status"] or "active",
-                    qr_code=r["qr_code"] or ""
-                )
-                for r in rows
-            ]
+            return [_row_to_student(r) for r in rows]
 
 
 # =============================================================================
@@ -352,11 +677,23 @@ class Database:
 # =============================================================================
 
 _db: Optional[Database] = None
+_db_lock = threading.Lock()
 
 
 def get_db() -> Database:
-    """Get the database instance."""
+    """Get the database instance (thread-safe)."""
     global _db
     if _db is None:
-        _db = Database()
+        with _db_lock:
+            if _db is None:
+                _db = Database()
     return _db
+
+
+def _close_db() -> None:
+    """Close the shared database's connections at interpreter exit."""
+    if _db is not None:
+        _db.close()
+
+
+atexit.register(_close_db)
@@ -0,0 +1,117 @@
+"""
+Per-thread SQLite connections for C-Test Intake App.
+
+Shared by db.py and inventory_db.py so that each thread keeps one
+long-lived, tuned connection instead of reconnecting on every call.
+"""
+
+import itertools
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+# Distinct names for each instance's shared in-memory database
+_memory_ids = itertools.count()
+
+
+class ThreadConnections:
+    """
+    One long-lived SQLite connection per live thread, opened on first use.
+    
+    Connections belonging to threads that have finished are closed the next
+    time any thread opens a connection, so short-lived worker threads do not
+    pile up open file handles.
+    
+    ":memory:" is opened as a named shared-cache in-memory database, so all
+    threads see the same data; it lives until close().
+    """
+    
+    def __init__(self, database: Union[str, Path], pragmas: str,
+                 row_factory: Optional[Callable] = None, close_script: str = ""):
+        """
+        Args:
+            database: Database path, or ":memory:" for one shared in-memory database
+            pragmas: Script run once on every new connection
+            row_factory: Optional row factory for new connections
+            close_script: Optional script run on each connection before it is
+                closed (skipped if it is mid-transaction; errors are ignored)
+        """
+        self.database = database
+        self.pragmas = pragmas
+        self.row_factory = row_factory
+        self.close_script = close_script
+        
+        self._local = threading.local()
+        self._by_thread: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        
+        # A plain ":memory:" would give every thread its own empty database
+        self._uri = str(database) == ":memory:"
+        self._anchor: Optional[sqlite3.Connection] = None
+        if self._uri:
+            self.database = f"file:memdb{next(_memory_ids)}?mode=memory&cache=shared"
+            # Keeps the database alive while no thread has a connection open
+            self._anchor = sqlite3.connect(self.database, uri=True, check_same_thread=False)
+    
+    def get(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Database connection is closed")
+            
+            # check_same_thread=False only so finished threads' connections
+            # can be closed from whichever thread notices; each connection is
+            # still used by its own thread alone
+            # No detect_types: callers convert the few typed columns themselves
+            conn = sqlite3.connect(
+                self.database,
+                check_same_thread=False,
+                cached_statements=256,
+                uri=self._uri
+            )
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            conn.executescript(self.pragmas)
+            
+            with self._lock:
+                if self._closed:
+                    conn.close()
+                    raise sqlite3.ProgrammingError("Database connection is closed")
+                self._close_finished()
+                self._by_thread[threading.current_thread()] = conn
+            self._local.conn = conn
+        return conn
+    
+    def _close_finished(self) -> None:
+        """Close connections of threads that have ended. Call with _lock held."""
+        for thread in [t for t in self._by_thread if not t.is_alive()]:
+            self._close_connection(self._by_thread.pop(thread))
+    
+    def _close_connection(self, conn: sqlite3.Connection) -> None:
+        """Run close_script on a connection, then close it."""
+        # executescript() would commit an open transaction, so leave those be
+        if self.close_script and not conn.in_transaction:
+            try:
+                conn.executescript(self.close_script)
+            except sqlite3.Error:
+                pass  # Best effort only, e.g. another process holds the lock
+        conn.close()
+    
+    def __len__(self) -> int:
+        """Number of connections currently open."""
+        with self._lock:
+            return len(self._by_thread)
+    
+    def close(self) -> None:
+        """Close every thread's connection; later get() calls raise."""
+        with self._lock:
+            self._closed = True
+            for conn in self._by_thread.values():
+                self._close_connection(conn)
+            self._by_thread.clear()
+            if self._anchor is not None:
+                self._anchor.close()
+                self._anchor = None
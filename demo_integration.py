@@ -131,14 +131,18 @@ def demo_save_to_local_db():
         synced_to_inventory=False
     )
     
-    # Save to local database
     db = get_db()
-    result_id = db.add_c_test_result(result)
+    
+    # Save the result and cache the student together
+    with db.transaction():
+        result_id = db.add_c_test_result(result)
+        db.cache_student(student)
     
     print(f"\n✓ Saved to local database with ID: {result_id}")
     print(f"  Student ID: {result.student_id} (TEXT)")
     print(f"  Score: {result.score}/5")
     print(f"  Placement: {result.placement_level}")
+    print(f"\n✓ Student cached locally")
     
     # Retrieve and verify
     retrieved = db.get_c_test_result(result_id)
@@ -147,12 +151,9 @@ def demo_save_to_local_db():
     print(f"  Items graded: {len(retrieved.items)}")
     print(f"  Synced to inventory: {retrieved.synced_to_inventory}")
     
-    # Cache the student
-    db.cache_student(student)
-    print(f"\n✓ Student cached locally")
-    
     # Get student results
     student_results = db.get_student_results(student.student_id)
+    
     print(f"\n✓ Found {len(student_results)} result(s) for student {student.student_id}")
     
     return result_id
@@ -10,13 +10,29 @@ Schema matches the actual inventory.db structure:
 - class_roster: links students to classes
 """
 
+import atexit
+import operator
+import os
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Generator
+from typing import Dict, Iterator, List, Optional, Generator
 
+from db_connections import ThreadConnections
 from models import Student, CTestResult
 
+# config.py is optional here: without it the inventory is simply unavailable
+try:
+    from config import INVENTORY_DB_PATH
+except ImportError:
+    INVENTORY_DB_PATH = None
+
+
+# Dates are stored in the portal's 'YYYY-MM-DD HH:MM:SS' text format (any
+# tzinfo is dropped, not converted). Applied here rather than through a
+# global sqlite3 adapter, which would also change how db.py stores dates.
+_format_date = operator.methodcaller('strftime', '%Y-%m-%d %H:%M:%S')
+
 
 # SQL to create C-Test results table in inventory.db
 CREATE_C_TEST_TABLES = """
@@ -47,15 +63,121 @@ CREATE TABLE IF NOT EXISTS c_test_result_items (
     FOREIGN KEY (result_id) REFERENCES c_test_results(result_id) ON DELETE CASCADE
 );
 
--- Index for faster student lookups
-CREATE INDEX IF NOT EXISTS idx_c_test_student 
-ON c_test_results(student_id);
+-- Per-student lookups and history, newest first (replaces the older
+-- student_id-only index, which is a prefix of this one)
+DROP INDEX IF EXISTS idx_c_test_student;
+CREATE INDEX IF NOT EXISTS idx_c_test_student_date
+ON c_test_results(student_id, test_date DESC);
 
 -- Index for date-based queries
 CREATE INDEX IF NOT EXISTS idx_c_test_date 
 ON c_test_results(test_date);
 """
 
+# Applied once per connection; journal_mode persists in the database file,
+# and busy_timeout lets each thread's connection wait out the others' writes
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-64000;
+PRAGMA busy_timeout=5000;
+"""
+
+# Stay below SQLite's default limit on bound parameters per statement
+MAX_SQL_VARIABLES = 900
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+# Shared by all calls so the long-lived connection parses each one only once.
+
+SQL_HAS_C_TEST_TABLES = """SELECT 1 FROM sqlite_master
+    WHERE type = 'table' AND name = 'c_test_results'"""
+
+STUDENT_COLUMNS = """student_id, first_name, last_name, level, status, qr_code,
+    created_at, updated_at, archived_at"""
+
+SQL_SELECT_STUDENTS = f"""SELECT {STUDENT_COLUMNS}
+    FROM students
+    WHERE status = ?
+    ORDER BY last_name, first_name"""
+
+SQL_SELECT_ALL_STUDENTS = f"""SELECT {STUDENT_COLUMNS}
+    FROM students
+    ORDER BY last_name, first_name"""
+
+SQL_SELECT_STUDENT = f"""SELECT {STUDENT_COLUMNS}
+    FROM students
+    WHERE student_id = ?"""
+
+SQL_SELECT_STUDENTS_BY_LEVEL = f"""SELECT {STUDENT_COLUMNS}
+    FROM students
+    WHERE level = ? AND status = 'active'
+    ORDER BY last_name, first_name"""
+
+SQL_INSERT_RESULT = """INSERT INTO c_test_results
+    (student_id, test_version, test_date, num_items, num_correct,
+     percentage, score, placement_level, completed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SQL_INSERT_ITEM = """INSERT INTO c_test_result_items
+    (result_id, item_number, correct_word, student_answer, is_correct)
+    VALUES (?, ?, ?, ?, ?)"""
+
+SQL_SELECT_HISTORY = """SELECT test_version, test_date, score, placement_level,
+    num_correct, num_items, percentage
+    FROM c_test_results
+    WHERE student_id = ?
+    ORDER BY test_date DESC"""
+
+SQL_SELECT_HISTORY_FOR_STUDENTS = """SELECT student_id, test_version, test_date, score,
+    placement_level, num_correct, num_items, percentage
+    FROM c_test_results
+    WHERE student_id IN ({placeholders})
+    ORDER BY student_id, test_date DESC"""
+
+
+# =============================================================================
+# ROW CONVERSION
+# =============================================================================
+# Rows are plain tuples in the column order of the queries above.
+
+def _row_to_student(row: tuple) -> Student:
+    """Build a Student from a STUDENT_COLUMNS row."""
+    (student_id, first_name, last_name, level, status, qr_code,
+     created_at, updated_at, archived_at) = row
+    return Student(
+        student_id=student_id,
+        first_name=first_name,
+        last_name=last_name or "",
+        level=level or "",
+        status=status or "active",
+        qr_code=qr_code or "",
+        created_at=created_at,
+        updated_at=updated_at,
+        archived_at=archived_at
+    )
+
+
+def _row_to_history(row: tuple) -> dict:
+    """Build a history entry from a SQL_SELECT_HISTORY row."""
+    version, date, score, level, num_correct, num_items, percentage = row
+    return {
+        "version": version,
+        "date": date,
+        "score": score,
+        "level": level or "",
+        "num_correct": num_correct,
+        "num_items": num_items,
+        "percentage": percentage
+    }
+
+
+# =============================================================================
+# DATABASE CLASS
+# =============================================================================
 
 class InventoryDatabase:
     """Interface to the shared inventory.db database."""
@@ -68,46 +190,63 @@ class InventoryDatabase:
             db_path: Path to inventory.db. If None, uses config.INVENTORY_DB_PATH
         """
         if db_path is None:
-            try:
-                from config import INVENTORY_DB_PATH
-                db_path = INVENTORY_DB_PATH
-            except ImportError:
-                db_path = None
+            db_path = INVENTORY_DB_PATH
         
         self.db_path = Path(db_path) if db_path else None
-        self._available = self.db_path and self.db_path.exists()
+        self._db_path_str = str(self.db_path) if self.db_path else None
+        self._available = bool(self._db_path_str) and os.path.exists(self._db_path_str)
+        
+        # One long-lived connection per thread, returning plain tuples;
+        # Student dates are kept as the stored text
+        self._connections = ThreadConnections(self._db_path_str, PRAGMAS)
+        self._has_c_test_tables = False
     
     @contextmanager
     def _connect(self) -> Generator[sqlite3.Connection, None, None]:
-        """Context manager for database connections."""
-        if not self._available:
+        """Context manager wrapping this thread's connection in a transaction."""
+        if not self.is_available():
             raise ConnectionError(f"Inventory database not available at {self.db_path}")
         
-        conn = None
+        conn = self._connections.get()
         try:
-            conn = sqlite3.connect(
-                self.db_path,
-                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
-            )
-            conn.row_factory = sqlite3.Row
             yield conn
             conn.commit()
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise e
-        finally:
-            if conn:
-                conn.close()
+        except BaseException:
+            # Any failure, including KeyboardInterrupt, must not leave a
+            # transaction open on the long-lived connection
+            conn.rollback()
+            raise
+    
+    def _c_test_tables_exist(self, conn: sqlite3.Connection) -> bool:
+        """Check whether the C-Test tables exist, caching a positive answer."""
+        # Tables are created by initialize_c_test_tables() or by the portal,
+        # so keep probing until they appear. Only a read: reads must not take
+        # the shared database's write lock (newer indexes are added by
+        # initialize_c_test_tables)
+        if not self._has_c_test_tables:
+            row = conn.execute(SQL_HAS_C_TEST_TABLES).fetchone()
+            self._has_c_test_tables = row is not None
+        return self._has_c_test_tables
+    
+    def close(self) -> None:
+        """Close all database connections."""
+        self._connections.close()
     
     def is_available(self) -> bool:
         """Check if inventory database is available."""
+        # The portal may create inventory.db after startup, so keep
+        # checking until it appears; once found, the answer is cached
+        if not self._available and self._db_path_str:
+            self._available = os.path.exists(self._db_path_str)
         return self._available
     
     def initialize_c_test_tables(self) -> bool:
         """
         Create C-Test tables in inventory.db if they don't exist.
         
+        Also brings tables from older installs up to date (e.g. newer
+        indexes); every statement is IF NOT EXISTS.
+        
         Returns:
             True if successful, False otherwise
         """
@@ -117,6 +256,7 @@ class InventoryDatabase:
         try:
             with self._connect() as conn:
                 conn.executescript(CREATE_C_TEST_TABLES)
+            self._has_c_test_tables = True
             print("✓ C-Test tables initialized in inventory.db")
             return True
         except Exception as e:
@@ -137,41 +277,32 @@ class InventoryDatabase:
         Returns:
             List of Student objects
         """
+        return list(self.iter_students(status))
+    
+    def iter_students(self, status: str = 'active') -> Iterator[Student]:
+        """
+        Iterate over students, building each Student only when it is reached.
+        
+        Rows are fetched up front, so the connection is free again before
+        the first Student is yielded and other database calls are safe.
+        
+        Args:
+            status: Filter by status ('active', 'archived', or None for all)
+        
+        Yields:
+            Student objects, ordered by name
+        """
         if not self.is_available():
-            return []
+            return
         
         with self._connect() as conn:
             if status:
-                rows = conn.execute(
-                    """SELECT student_id, first_name, last_name, level, status, qr_code,
-                              created_at, updated_at, archived_at
-                       FROM students 
-                       WHERE status = ?
-                       ORDER BY last_name, first_name""",
-                    (status,)
-                ).fetchall()
+                rows = conn.execute(SQL_SELECT_STUDENTS, (status,)).fetchall()
             else:
-                rows = conn.execute(
-                    """SELECT student_id, first_name, last_name, level, status, qr_code,
-                              created_at, updated_at, archived_at
-                       FROM students 
-                       ORDER BY last_name, first_name"""
-                ).fetchall()
-            
-            return [
-                Student(
-                    student_id=row["student_id"],
-                    first_name=row["first_name"],
-                    last_name=row["last_name"] or "",
-                    level=row["level"] or "",
-                    status=row["status"] or "active",
-                    qr_code=row["qr_code"] or "",
-                    created_at=row["created_at"],
-                    updated_at=row["updated_at"],
-                    archived_at=row["archived_at"]
-                )
-                for row in rows
-            ]
+                rows = conn.execute(SQL_SELECT_ALL_STUDENTS).fetchall()
+        
+        for row in rows:
+            yield _row_to_student(row)
     
     def get_student(self, student_id: str) -> Optional[Student]:
         """
@@ -187,27 +318,9 @@ class InventoryDatabase:
             return None
         
         with self._connect() as conn:
-            row = conn.execute(
-                """SELECT student_id, first_name, last_name, level, status, qr_code,
-                          created_at, updated_at, archived_at
-                   FROM students 
-                   WHERE student_id = ?""",
-                (student_id,)
-            ).fetchone()
+            row = conn.execute(SQL_SELECT_STUDENT, (student_id,)).fetchone()
             
-            if row:
-                return Student(
-                    student_id=row["student_id"],
-                    first_name=row["first_name"],
-                    last_name=row["last_name"] or "",
-                    level=row["level"] or "",
-                    status=row["status"] or "active",
-                    qr_code=row["qr_code"] or "",
-                    created_at=row["created_at"],
-                    updated_at=row["updated_at"],
-                    archived_at=row["archived_at"]
-                )
-            return None
+            return _row_to_student(row) if row else None
     
     def get_students_by_level(self, level: str) -> List[Student]:
         """
@@ -223,29 +336,8 @@ class InventoryDatabase:
             return []
         
         with self._connect() as conn:
-            rows = conn.execute(
-                """SELECT student_id, first_name, last_name, level, status, qr_code,
-                          created_at, updated_at, archived_at
-                   FROM students 
-                   WHERE level = ? AND status = 'active'
-                   ORDER BY last_name, first_name""",
-                (level,)
-            ).fetchall()
-            
-            return [
-                Student(
-                    student_id=row["student_id"],
-                    first_name=row["first_name"],
-                    last_name=row["last_name"] or "",
-                    level=row["level"] or "",
-                    status=row["status"] or "active",
-                    qr_code=row["qr_code"] or "",
-                    created_at=row["created_at"],
-                    updated_at=row["updated_at"],
-                    archived_at=row["archived_at"]
-                )
-                for row in rows
-            ]
+            cursor = conn.execute(SQL_SELECT_STUDENTS_BY_LEVEL, (level,))
+            return [_row_to_student(row) for row in cursor]
     
     # =========================================================================
     # C-TEST RESULT OPERATIONS
@@ -265,27 +357,27 @@ class InventoryDatabase:
             raise ConnectionError("Cannot save to inventory.db - not available")
         
         with self._connect() as conn:
+            # Take the write lock up front so result and items commit together
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            
             # Insert main result
             cursor = conn.execute(
-                """INSERT INTO c_test_results
-                   (student_id, test_version, test_date, num_items, num_correct,
-                    percentage, score, placement_level, completed)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                SQL_INSERT_RESULT,
                 (result.student_id, result.test_version,
-                 result.test_date.strftime('%Y-%m-%d %H:%M:%S') if result.test_date else None,
+                 _format_date(result.test_date) if result.test_date else None,
                  result.num_items, result.num_correct, result.percentage,
                  result.score, result.placement_level, 1 if result.completed else 0)
             )
             result_id = cursor.lastrowid
             
-            # Save item-level details
-            for item in result.items:
-                conn.execute(
-                    """INSERT INTO c_test_result_items
-                       (result_id, item_number, correct_word, student_answer, is_correct)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (result_id, item.item_number, item.original_word,
-                     item.student_answer, 1 if item.is_correct else 0)
+            # Save item-level details (summary-only results have none)
+            if result.items:
+                conn.executemany(
+                    SQL_INSERT_ITEM,
+                    [(result_id, item.item_number, item.original_word,
+                      item.student_answer, 1 if item.is_correct else 0)
+                     for item in result.items]
                 )
             
             return result_id
@@ -303,32 +395,42 @@ class InventoryDatabase:
         if not self.is_available():
             return []
         
-        try:
-            with self._connect() as conn:
-                rows = conn.execute(
-                    """SELECT test_version, test_date, score, placement_level, 
-                              num_correct, num_items, percentage
-                       FROM c_test_results
-                       WHERE student_id = ?
-                       ORDER BY test_date DESC""",
-                    (student_id,)
-                ).fetchall()
-                
-                return [
-                    {
-                        "version": row["test_version"],
-                        "date": row["test_date"],
-                        "score": row["score"],
-                        "level": row["placement_level"] or "",
-                        "num_correct": row["num_correct"],
-                        "num_items": row["num_items"],
-                        "percentage": row["percentage"]
-                    }
-                    for row in rows
-                ]
-        except sqlite3.OperationalError:
-            # Table doesn't exist yet
-            return []
+        with self._connect() as conn:
+            if not self._c_test_tables_exist(conn):
+                return []
+            cursor = conn.execute(SQL_SELECT_HISTORY, (student_id,))
+            return [_row_to_history(row) for row in cursor]
+    
+    def get_c_test_history_bulk(self, student_ids: List[str]) -> Dict[str, List[dict]]:
+        """
+        Get C-test history for several students with one query per chunk.
+        
+        Args:
+            student_ids: Student IDs (TEXT)
+            
+        Returns:
+            Dictionary mapping each student ID to its history, newest first,
+            in the same format as get_student_c_test_history
+        """
+        history: Dict[str, List[dict]] = {student_id: [] for student_id in student_ids}
+        if not history or not self.is_available():
+            return history
+        
+        ids = list(history)
+        with self._connect() as conn:
+            if not self._c_test_tables_exist(conn):
+                return history
+            for start in range(0, len(ids), MAX_SQL_VARIABLES):
+                chunk = ids[start:start + MAX_SQL_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    SQL_SELECT_HISTORY_FOR_STUDENTS.format(placeholders=placeholders),
+                    chunk
+                )
+                for student_id, *row in cursor:
+                    history[student_id].append(_row_to_history(row))
+        
+        return history
     
     def get_latest_c_test_result(self, student_id: str) -> Optional[dict]:
         """
@@ -357,3 +459,15 @@ def get_inventory_db() -> InventoryDatabase:
     if _inventory_db is None:
         _inventory_db = InventoryDatabase()
     return _inventory_db
+
+
+def reset_inventory_db() -> None:
+    """Close and forget the inventory database instance (e.g. between tests)."""
+    global _inventory_db
+    if _inventory_db is not None:
+        _inventory_db.close()
+    _inventory_db = None
+
+
+# Close the shared instance's connections at interpreter exit
+atexit.register(reset_inventory_db)
@@ -4,12 +4,18 @@ Data models for C-Test Intake App.
 Dataclasses for C-test specific data and student information.
 """
 
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List
+from typing import NamedTuple, Optional, List
 
 
-@dataclass
+# Slotted instances drop the per-object __dict__; dataclass() only
+# accepts slots= on Python 3.10+, so older versions keep plain classes
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class Student:
     """A student in the system (matches inventory.db schema)."""
     student_id: str = ""  # TEXT primary key (e.g., '20231107')
@@ -33,9 +39,13 @@ class Student:
         return self.student_id
 
 
-@dataclass
-class CTestItem:
-    """A single C-test completion item."""
+class CTestItem(NamedTuple):
+    """
+    A single C-test completion item.
+    
+    A NamedTuple rather than a dataclass: the grader creates one per answer,
+    and items are never modified after grading.
+    """
     item_number: int
     original_word: str
     fragment_shown: str
@@ -43,7 +53,7 @@ class CTestItem:
     is_correct: bool = False
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class CTestResult:
     """A complete C-test result for a student."""
     id: Optional[int] = None
@@ -10,7 +10,7 @@ Tests the C-test grading functionality including:
 """
 
 import unittest
-from c_test_grader import CTestGrader, grade_c_test
+from c_test_grader import CTestGrader, grade_c_test, grade_batch, score_batch
 from models import CTestItem
 
 
@@ -106,6 +106,14 @@ class TestCTestGrader(unittest.TestCase):
         self.assertEqual(score, 5)
         self.assertTrue(all(item.is_correct for item in items))
     
+    def test_unicode_case_folding(self):
+        """Test that case-insensitive matching uses full Unicode case folding."""
+        grader = CTestGrader({1: "straße"})
+        
+        score, items, feedback = grader.grade_submission({1: "STRASSE"})
+        
+        self.assertTrue(items[0].is_correct)
+    
     def test_whitespace_handling(self):
         """Test that extra whitespace is handled correctly."""
         student_answers = {
@@ -228,6 +236,20 @@ class TestCTestGrader(unittest.TestCase):
         self.assertEqual(score, 1)
         self.assertEqual(sum(1 for item in items if item.is_correct), 3)
     
+    def test_score_only_matches_grade_submission(self):
+        """Test that score_only returns the same score as grade_submission."""
+        submissions = [
+            dict(self.answer_key),
+            {},
+            {1: "weather", 2: "cold", 3: "yesterday"},
+            {1: "WEATHER", 2: "wrong", 3: "yesterday", 4: "morning", 5: "walked"},
+        ]
+        
+        for student_answers in submissions:
+            with self.subTest(student_answers=student_answers):
+                score, _, _ = self.grader.grade_submission(student_answers)
+                self.assertEqual(self.grader.score_only(student_answers), score)
+    
     def test_feedback_generation(self):
         """Test that feedback is generated correctly."""
         student_answers = {
@@ -258,6 +280,30 @@ class TestCTestGrader(unittest.TestCase):
         
         self.assertEqual(score, 5)
         self.assertEqual(len(items), 2)
+    
+    def test_grade_batch(self):
+        """Test grading several submissions against one answer key."""
+        submissions = [
+            dict(self.answer_key),
+            {},
+            {1: "weather", 2: "cold", 3: "yesterday"},
+        ]
+        
+        results = grade_batch(self.answer_key, submissions)
+        
+        self.assertEqual([score for score, _, _ in results], [5, 0, 1])
+        self.assertTrue(all(len(items) == 8 for _, items, _ in results))
+        self.assertEqual(results[2], self.grader.grade_submission(submissions[2]))
+    
+    def test_score_batch(self):
+        """Test score-only grading of several submissions."""
+        submissions = [
+            dict(self.answer_key),
+            {},
+            {1: "weather", 2: "cold", 3: "yesterday"},
+        ]
+        
+        self.assertEqual(score_batch(self.answer_key, submissions), [5, 0, 1])
 
 
 class TestEdgeCases(unittest.TestCase):
@@ -53,6 +53,14 @@ class TestNumberedListParsing(unittest.TestCase):
         self.assertEqual(answers[1], "weather")
         self.assertEqual(answers[2], "cold")
     
+    def test_numbered_list_with_non_breaking_space(self):
+        """Test parsing when a non-breaking space follows the number."""
+        text = "1.\xa0weather\n2)\xa0cold"
+        
+        answers = _parse_numbered_list(text, num_items=2)
+        
+        self.assertEqual(answers, {1: "weather", 2: "cold"})
+    
     def test_numbered_list_with_extra_whitespace(self):
         """Test parsing with extra whitespace."""
         text = """
@@ -125,6 +133,18 @@ class TestNumberedListParsing(unittest.TestCase):
         
         self.assertEqual(len(answers), 3)
         self.assertEqual(answers[1], "weather")
+    
+    def test_numbered_list_answer_on_next_line_ignored(self):
+        """Test that a number and a word on separate lines are not joined."""
+        text = """
+        1.
+        weather
+        2. cold
+        """
+        
+        answers = _parse_numbered_list(text, num_items=2)
+        
+        self.assertEqual(answers, {2: "cold"})
 
 
 class TestBracketFormatParsing(unittest.TestCase):
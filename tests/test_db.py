@@ -0,0 +1,665 @@
+"""
+Unit tests for db.py and inventory_db.py
+
+Tests the database layers including:
+- Timestamp conversion
+- Startup migration of ISO test dates
+- Transactions
+- Result items, full and lite
+- Lookup cache invalidation
+- Per-thread connections
+- Inventory students and bulk history
+"""
+
+import contextlib
+import gc
+import io
+import sqlite3
+import sys
+import tempfile
+import threading
+import types
+import unittest
+import weakref
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# db.py reads DB_PATH from the per-install config.py; these tests always
+# pass an explicit path, so any config (or none) will do
+try:
+    import config  # noqa: F401
+except ImportError:
+    sys.modules["config"] = types.SimpleNamespace(DB_PATH=None, INVENTORY_DB_PATH=None)
+
+import db
+from db_connections import ThreadConnections
+from db import Database, _from_timestamp, _to_timestamp
+from inventory_db import InventoryDatabase
+from models import CTestItem, CTestResult, Student
+
+# c_test_results as created before test_date became INTEGER
+LEGACY_RESULTS_TABLE = """
+CREATE TABLE c_test_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    test_version TEXT NOT NULL,
+    test_date TEXT NOT NULL,
+    num_items INTEGER NOT NULL,
+    num_correct INTEGER NOT NULL,
+    percentage REAL NOT NULL,
+    score INTEGER NOT NULL,
+    placement_level TEXT,
+    completed INTEGER DEFAULT 1,
+    synced_to_inventory INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def open_database(path: Path) -> Database:
+    """Open a Database without its startup message."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Database(path)
+
+
+def insert_raw_date(conn: sqlite3.Connection, test_date) -> None:
+    """Insert a c_test_results row with test_date stored exactly as given."""
+    conn.execute(
+        """INSERT INTO c_test_results
+           (student_id, test_version, test_date, num_items, num_correct, percentage, score)
+           VALUES ('s1', 'A', ?, 1, 1, 100.0, 5)""",
+        (test_date,)
+    )
+
+
+def make_result(student_id: str = "s1", version: str = "A", **kwargs) -> CTestResult:
+    """Build a small graded result with three items."""
+    items = [
+        CTestItem(1, "weather", "", "weather", True),
+        CTestItem(2, "cold", "", "colt", False),
+        CTestItem(3, "late", "", "", False),
+    ]
+    kwargs.setdefault("test_date", datetime(2024, 5, 1, 9, 0))
+    return CTestResult(
+        student_id=student_id, test_version=version, items=items,
+        num_items=3, num_correct=1, percentage=33.3, score=1, **kwargs
+    )
+
+
+def count_results(path: Path) -> int:
+    """Count result rows as seen by a separate connection."""
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM c_test_results").fetchone()[0]
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base class providing a temporary directory for database files."""
+    
+    def setUp(self):
+        """Create a temporary directory for database files."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp_path = Path(tmp.name)
+
+
+class TestTimestamps(unittest.TestCase):
+    """Test cases for test_date conversion."""
+    
+    def test_naive_round_trip(self):
+        """Test that a naive datetime survives conversion unchanged."""
+        value = datetime(2024, 5, 1, 9, 30, 15)
+        
+        self.assertEqual(_from_timestamp(_to_timestamp(value)), value)
+    
+    def test_naive_treated_as_utc(self):
+        """Test that naive datetimes are stored as UTC seconds."""
+        self.assertEqual(_to_timestamp(datetime(1970, 1, 2)), 86400)
+    
+    def test_aware_converted_to_utc(self):
+        """Test that an aware datetime is stored as its UTC instant."""
+        value = datetime(2024, 5, 1, 9, 0, tzinfo=timezone(timedelta(hours=2)))
+        
+        self.assertEqual(_from_timestamp(_to_timestamp(value)), datetime(2024, 5, 1, 7, 0))
+    
+    def test_microseconds_truncated(self):
+        """Test that sub-second precision is dropped."""
+        value = datetime(2024, 5, 1, 9, 30, 15, 999999)
+        
+        self.assertEqual(_from_timestamp(_to_timestamp(value)), value.replace(microsecond=0))
+    
+    def test_none_and_empty(self):
+        """Test that missing dates stay missing."""
+        self.assertIsNone(_to_timestamp(None))
+        self.assertIsNone(_from_timestamp(None))
+        self.assertIsNone(_from_timestamp(""))
+    
+    def test_digits_from_text_column(self):
+        """Test that digits stored in a TEXT column are read as seconds."""
+        self.assertEqual(_from_timestamp("86400"), datetime(1970, 1, 2))
+
+
+class TestMigrateTestDates(DatabaseTestCase):
+    """Test cases for the startup test_date migration."""
+    
+    def _dates(self, path: Path):
+        """Return (test_date, typeof) pairs in insertion order."""
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            return conn.execute(
+                "SELECT test_date, typeof(test_date) FROM c_test_results ORDER BY id"
+            ).fetchall()
+    
+    def test_legacy_text_table(self):
+        """Test migrating ISO strings in a TEXT-affinity test_date column."""
+        path = self.tmp_path / "legacy.db"
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            conn.executescript(LEGACY_RESULTS_TABLE)
+            insert_raw_date(conn, "2024-05-01T09:00:00.123456")
+            insert_raw_date(conn, "2024-05-01 09:00:00+02:00")
+            conn.commit()
+        
+        database = open_database(path)
+        self.addCleanup(database.close)
+        
+        expected = [
+            _to_timestamp(datetime(2024, 5, 1, 9, 0)),
+            _to_timestamp(datetime(2024, 5, 1, 7, 0)),
+        ]
+        # TEXT affinity keeps the migrated seconds as digit strings
+        self.assertEqual(self._dates(path), [(str(e), "text") for e in expected])
+        
+        # A date written by the new code into the TEXT column is left alone
+        database.add_c_test_result(
+            CTestResult(student_id="s1", test_version="B", test_date=datetime(2024, 6, 1))
+        )
+        database.close()
+        database = open_database(path)
+        self.addCleanup(database.close)
+        
+        results = database.get_student_results("s1")
+        self.assertEqual(
+            [r.test_date for r in results],
+            [datetime(2024, 6, 1), datetime(2024, 5, 1, 9, 0), datetime(2024, 5, 1, 7, 0)]
+        )
+    
+    def test_integer_table(self):
+        """Test migrating leftover ISO strings in an INTEGER-affinity column."""
+        path = self.tmp_path / "current.db"
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            conn.executescript(db.SCHEMA)
+            insert_raw_date(conn, "2024-05-01 09:00:00")
+            insert_raw_date(conn, 86400)
+            conn.commit()
+        
+        for _ in range(2):  # Running it again must change nothing
+            open_database(path).close()
+            self.assertEqual(
+                self._dates(path),
+                [(_to_timestamp(datetime(2024, 5, 1, 9, 0)), "integer"), (86400, "integer")]
+            )
+    
+    def test_unparseable_text_is_left_alone(self):
+        """Test that dates strftime cannot parse do not block startup."""
+        path = self.tmp_path / "odd.db"
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            conn.executescript(db.SCHEMA)
+            insert_raw_date(conn, "2024-05-01 9:00")
+            insert_raw_date(conn, "2024-05-01 09:00")
+            conn.commit()
+        
+        for _ in range(2):
+            open_database(path).close()
+            self.assertEqual(
+                self._dates(path),
+                [("2024-05-01 9:00", "text"), (_to_timestamp(datetime(2024, 5, 1, 9, 0)), "integer")]
+            )
+    
+    def test_same_second_results_newest_first(self):
+        """Test that results saved within one second keep insertion order."""
+        database = open_database(self.tmp_path / "c_test.db")
+        self.addCleanup(database.close)
+        when = datetime(2024, 5, 1, 9, 0, 0, 500)
+        for version in ("A", "B", "C"):
+            database.add_c_test_result(
+                CTestResult(student_id="s1", test_version=version, test_date=when)
+            )
+        
+        versions = [r.test_version for r in database.get_student_results("s1")]
+        
+        self.assertEqual(versions, ["C", "B", "A"])
+
+
+class TestLookupCaches(DatabaseTestCase):
+    """Test cases for the template and student lookup caches."""
+    
+    def setUp(self):
+        """Open a fresh database."""
+        super().setUp()
+        self.database = open_database(self.tmp_path / "c_test.db")
+        self.addCleanup(self.database.close)
+    
+    def test_student_cache_invalidated_by_write(self):
+        """Test that re-caching a student replaces the cached copy."""
+        self.database.cache_student(Student(student_id="s1", first_name="Ann", last_name="Lee"))
+        self.assertEqual(self.database.get_cached_student("s1").level, "")
+        
+        self.database.bulk_cache_students(
+            [Student(student_id="s1", first_name="Ann", last_name="Lee", level="SM4")]
+        )
+        
+        self.assertEqual(self.database.get_cached_student("s1").level, "SM4")
+    
+    def test_stale_read_not_cached(self):
+        """Test that a row read before a concurrent write is not cached."""
+        database = self.database
+        database.cache_student(Student(student_id="s1", first_name="Old", last_name="Lee"))
+        real_row_to_student = db._row_to_student
+        
+        def convert_then_write(row):
+            # Simulate another writer committing between the read and the fill
+            student = real_row_to_student(row)
+            with mock.patch.object(db, "_row_to_student", real_row_to_student):
+                database.cache_student(Student(student_id="s1", first_name="New", last_name="Lee"))
+            return student
+        
+        with mock.patch.object(db, "_row_to_student", convert_then_write):
+            self.assertEqual(database.get_cached_student("s1").first_name, "Old")
+        
+        self.assertEqual(database.get_cached_student("s1").first_name, "New")
+    
+    def test_cached_copy_is_independent(self):
+        """Test that callers cannot modify the cached student."""
+        self.database.cache_student(Student(student_id="s1", first_name="Ann", last_name="Lee"))
+        self.database.get_cached_student("s1").first_name = "Changed"
+        
+        self.assertEqual(self.database.get_cached_student("s1").first_name, "Ann")
+    
+    def test_template_caches_invalidated_by_add(self):
+        """Test that adding a template refreshes the template list."""
+        self.database.add_c_test_template("A", "The wea____", '{"1": "weather"}', 1)
+        self.assertEqual([t.version for t in self.database.list_c_test_templates()], ["A"])
+        self.assertEqual(self.database.get_c_test_template("A")["num_items"], 1)
+        
+        self.database.add_c_test_template("B", "col____", '{"1": "cold"}', 1)
+        
+        self.assertEqual([t.version for t in self.database.list_c_test_templates()], ["A", "B"])
+        self.assertIsNone(self.database.get_c_test_template("C"))
+    
+    def test_rolled_back_read_not_cached(self):
+        """Test that rows read inside a rolled-back transaction are not cached."""
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction():
+                self.database.cache_student(
+                    Student(student_id="s1", first_name="Ann", last_name="Lee")
+                )
+                self.assertIsNotNone(self.database.get_cached_student("s1"))
+                raise RuntimeError("abort")
+        
+        self.assertIsNone(self.database.get_cached_student("s1"))
+
+
+class TestThreadConnections(DatabaseTestCase):
+    """Test cases for per-thread connection handling."""
+    
+    def test_one_connection_per_thread(self):
+        """Test that a thread reuses its own connection."""
+        connections = ThreadConnections(str(self.tmp_path / "t.db"), "")
+        self.addCleanup(connections.close)
+        
+        self.assertIs(connections.get(), connections.get())
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(connections.get()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], connections.get())
+    
+    def test_finished_threads_connections_closed(self):
+        """Test that connections of finished threads do not accumulate."""
+        connections = ThreadConnections(str(self.tmp_path / "t.db"), "")
+        self.addCleanup(connections.close)
+        opened = []
+        
+        for _ in range(5):
+            thread = threading.Thread(target=lambda: opened.append(connections.get()))
+            thread.start()
+            thread.join()
+        connections.get()
+        
+        # Every worker has finished, so only this thread's connection is left
+        self.assertEqual(len(connections), 1)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+    
+    def test_memory_database_shared_between_threads(self):
+        """Test that every thread sees the same ":memory:" database."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            database = Database(":memory:")
+        self.addCleanup(database.close)
+        database.add_c_test_result(make_result())
+        
+        counts = []
+        thread = threading.Thread(
+            target=lambda: counts.append(len(database.get_student_results("s1")))
+        )
+        thread.start()
+        thread.join()
+        self.assertEqual(counts, [1])
+        
+        # Separate instances do not share data
+        other = ThreadConnections(":memory:", "")
+        self.addCleanup(other.close)
+        tables = other.get().execute("SELECT name FROM sqlite_master").fetchall()
+        self.assertEqual(tables, [])
+    
+    def test_close_refreshes_statistics(self):
+        """Test that closing a Database gathers stats for the tables it queried."""
+        path = self.tmp_path / "c_test.db"
+        database = open_database(path)
+        for n in range(20):
+            database.add_c_test_result(make_result(f"s{n % 4}"))
+        database.get_student_results("s1")
+        
+        database.close()
+        
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            tables = conn.execute("SELECT DISTINCT tbl FROM sqlite_stat1").fetchall()
+        self.assertIn(("c_test_results",), tables)
+    
+    def test_close(self):
+        """Test that close() closes connections and refuses new ones."""
+        connections = ThreadConnections(str(self.tmp_path / "t.db"), "")
+        conn = connections.get()
+        
+        connections.close()
+        
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        errors = []
+        
+        def connect():
+            try:
+                connections.get()
+            except sqlite3.ProgrammingError as e:
+                errors.append(e)
+        
+        thread = threading.Thread(target=connect)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+    
+    def test_database_not_kept_alive(self):
+        """Test that an unused Database can be garbage collected."""
+        database = open_database(self.tmp_path / "c_test.db")
+        ref = weakref.ref(database)
+        
+        del database
+        gc.collect()
+        
+        self.assertIsNone(ref())
+
+
+class TestTransaction(DatabaseTestCase):
+    """Test cases for Database.transaction()."""
+    
+    def setUp(self):
+        """Open a fresh database."""
+        super().setUp()
+        self.path = self.tmp_path / "c_test.db"
+        self.database = open_database(self.path)
+        self.addCleanup(self.database.close)
+    
+    def test_commit(self):
+        """Test that a successful block commits every operation."""
+        with self.database.transaction():
+            self.database.add_c_test_result(make_result(version="A"))
+            self.database.add_c_test_result(make_result(version="B"))
+            # Not visible to other connections before the block ends
+            self.assertEqual(count_results(self.path), 0)
+        
+        self.assertEqual(count_results(self.path), 2)
+    
+    def test_rollback(self):
+        """Test that an exception rolls back every operation in the block."""
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction():
+                self.database.add_c_test_result(make_result())
+                self.database.cache_student(Student(student_id="s1", first_name="A", last_name="B"))
+                raise RuntimeError("abort")
+        
+        self.assertEqual(count_results(self.path), 0)
+        self.assertEqual(self.database.get_all_cached_students(), [])
+    
+    def test_rollback_on_keyboard_interrupt(self):
+        """Test that KeyboardInterrupt does not leave a transaction open."""
+        with self.assertRaises(KeyboardInterrupt):
+            with self.database.transaction():
+                self.database.add_c_test_result(make_result())
+                raise KeyboardInterrupt
+        
+        # A later write must not commit the interrupted one
+        self.database.mark_result_synced(999)
+        self.assertEqual(count_results(self.path), 0)
+    
+    def test_nested_joins_outer(self):
+        """Test that nested blocks commit or roll back with the outermost one."""
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction():
+                with self.database.transaction():
+                    self.database.add_c_test_result(make_result())
+                # Still pending after the inner block ends
+                self.assertEqual(count_results(self.path), 0)
+                raise RuntimeError("abort")
+        self.assertEqual(count_results(self.path), 0)
+        
+        with self.database.transaction():
+            with self.database.transaction():
+                self.database.add_c_test_result(make_result())
+        self.assertEqual(count_results(self.path), 1)
+    
+    def test_usable_after_rollback(self):
+        """Test that methods commit normally after a rolled-back block."""
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction():
+                raise RuntimeError("abort")
+        
+        self.database.add_c_test_result(make_result())
+        
+        self.assertEqual(count_results(self.path), 1)
+
+
+class TestResultItems(DatabaseTestCase):
+    """Test cases for storing and reading result items."""
+    
+    def setUp(self):
+        """Open a fresh database."""
+        super().setUp()
+        self.database = open_database(self.tmp_path / "c_test.db")
+        self.addCleanup(self.database.close)
+    
+    def test_round_trip(self):
+        """Test that saved items read back unchanged."""
+        result = make_result()
+        result_id = self.database.add_c_test_result(result)
+        
+        loaded = self.database.get_c_test_result(result_id)
+        
+        self.assertEqual(loaded.items, result.items)
+        self.assertEqual(loaded.test_date, result.test_date)
+        self.assertEqual(self.database.get_student_results("s1")[0].items, result.items)
+    
+    def test_lite_matches_full(self):
+        """Test that lite item tuples hold the same data as full items."""
+        result_id = self.database.add_c_test_result(make_result())
+        
+        full = self.database.get_c_test_result(result_id)
+        lite = self.database.get_c_test_result(result_id, lite=True)
+        
+        self.assertEqual(
+            lite.items,
+            [(i.item_number, i.original_word, i.student_answer, int(i.is_correct))
+             for i in full.items]
+        )
+        self.assertEqual((lite.id, lite.score, lite.test_date), (full.id, full.score, full.test_date))
+    
+    def test_missing_answer_reads_blank(self):
+        """Test that a missing answer reads back as blank, not as the key."""
+        result = make_result()
+        result.items = [CTestItem(1, "weather", "", None, False)]
+        result_id = self.database.add_c_test_result(result)
+        
+        self.assertEqual(self.database.get_c_test_result(result_id).items[0].student_answer, "")
+        self.assertEqual(self.database.get_c_test_result(result_id, lite=True).items[0][2], "")
+    
+    def test_add_result_items(self):
+        """Test adding items to an existing result, kept in item order."""
+        result = make_result()
+        items, result.items = result.items, []
+        result_id = self.database.add_c_test_result(result)
+        
+        self.database.add_result_items(result_id, list(reversed(items)))
+        
+        self.assertEqual(self.database.get_c_test_result(result_id).items, items)
+    
+    def test_missing_result(self):
+        """Test that an unknown result ID returns None."""
+        self.assertIsNone(self.database.get_c_test_result(999))
+        self.assertIsNone(self.database.get_c_test_result(999, lite=True))
+    
+    def test_student_results_batched(self):
+        """Test that items are grouped per result across IN-list chunks."""
+        ids = [self.database.add_c_test_result(make_result(version=v)) for v in "ABC"]
+        
+        with mock.patch.object(db, "MAX_SQL_VARIABLES", 2):
+            results = self.database.get_student_results("s1")
+        
+        self.assertEqual([r.id for r in results], ids[::-1])
+        self.assertTrue(all(len(r.items) == 3 for r in results))
+
+
+class TestBulkCacheStudents(DatabaseTestCase):
+    """Test cases for Database.bulk_cache_students()."""
+    
+    def test_bulk_cache(self):
+        """Test caching and updating several students at once."""
+        database = open_database(self.tmp_path / "c_test.db")
+        self.addCleanup(database.close)
+        
+        database.bulk_cache_students([
+            Student(student_id="s2", first_name="Bob", last_name="Young"),
+            Student(student_id="s1", first_name="Ann", last_name="Lee", level="SM4"),
+        ])
+        database.bulk_cache_students([Student(student_id="s2", first_name="Bob", last_name="Adams")])
+        
+        self.assertEqual(
+            [(s.student_id, s.last_name) for s in database.get_all_cached_students()],
+            [("s2", "Adams"), ("s1", "Lee")]
+        )
+        self.assertEqual(database.get_cached_student("s1").level, "SM4")
+        database.bulk_cache_students([])
+
+
+class TestInventoryDatabase(DatabaseTestCase):
+    """Test cases for InventoryDatabase reads and writes."""
+    
+    def setUp(self):
+        """Create an inventory.db with a few students and the C-Test tables."""
+        super().setUp()
+        path = self.tmp_path / "inventory.db"
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            conn.executescript("""
+                CREATE TABLE students (
+                    student_id TEXT PRIMARY KEY, first_name TEXT, last_name TEXT,
+                    level TEXT, status TEXT, qr_code TEXT,
+                    created_at TEXT, updated_at TEXT, archived_at TEXT
+                );
+                INSERT INTO students (student_id, first_name, last_name, level, status)
+                VALUES ('s1', 'Ann', 'Lee', 'SM4', 'active'),
+                       ('s2', 'Bob', 'Adams', 'SM4', 'active'),
+                       ('s3', 'Cy', 'Zed', 'SM2', 'archived');
+            """)
+        self.inventory = InventoryDatabase(path)
+        self.addCleanup(self.inventory.close)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.inventory.initialize_c_test_tables())
+    
+    def test_iter_students(self):
+        """Test streaming students matches get_students."""
+        active = list(self.inventory.iter_students())
+        
+        self.assertEqual([s.student_id for s in active], ["s2", "s1"])
+        self.assertEqual(active, self.inventory.get_students())
+        self.assertEqual(len(list(self.inventory.iter_students(None))), 3)
+    
+    def test_iter_students_allows_other_calls(self):
+        """Test that other queries and writes work while iterating students."""
+        students = self.inventory.iter_students()
+        first = next(students)
+        
+        self.assertEqual(self.inventory.get_student("s1").first_name, "Ann")
+        self.inventory.save_c_test_result(make_result(first.student_id))
+        students.close()
+        
+        self.assertEqual(len(self.inventory.get_student_c_test_history("s2")), 1)
+    
+    def test_initialize_replaces_student_index(self):
+        """Test that the student_id-only index gives way to the composite one."""
+        path = self.inventory.db_path
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            conn.execute("CREATE INDEX idx_c_test_student ON c_test_results(student_id)")
+            conn.commit()
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.inventory.initialize_c_test_tables())
+        
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            indexes = {name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+            )}
+        self.assertEqual(indexes, {"idx_c_test_student_date", "idx_c_test_date"})
+    
+    def test_saved_date_format(self):
+        """Test that dates are stored as portal text, without any UTC offset."""
+        aware = datetime(2024, 5, 1, 9, 30, 15, 500, tzinfo=timezone(timedelta(hours=2)))
+        self.inventory.save_c_test_result(make_result(test_date=aware))
+        
+        self.assertEqual(
+            self.inventory.get_latest_c_test_result("s1")["date"], "2024-05-01 09:30:15"
+        )
+    
+    def test_history_read_does_not_write(self):
+        """Test that reading history from portal-made tables adds no indexes."""
+        path = self.tmp_path / "portal.db"
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            conn.execute("CREATE TABLE c_test_results (student_id TEXT, test_version TEXT, "
+                         "test_date TEXT, score INTEGER, placement_level TEXT, "
+                         "num_correct INTEGER, num_items INTEGER, percentage REAL)")
+        inventory = InventoryDatabase(path)
+        self.addCleanup(inventory.close)
+        
+        self.assertEqual(inventory.get_student_c_test_history("s1"), [])
+        
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            indexes = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            self.assertEqual(indexes.fetchall(), [])
+    
+    def test_history_bulk_groups_by_student(self):
+        """Test bulk history groups rows per student, newest first."""
+        for student_id, day in (("s1", 1), ("s2", 2), ("s1", 3)):
+            self.inventory.save_c_test_result(
+                make_result(student_id, version=str(day), test_date=datetime(2024, 5, day))
+            )
+        
+        with mock.patch("inventory_db.MAX_SQL_VARIABLES", 1):
+            history = self.inventory.get_c_test_history_bulk(["s1", "s2", "s3", "s1"])
+        
+        self.assertEqual(list(history), ["s1", "s2", "s3"])
+        self.assertEqual([h["version"] for h in history["s1"]], ["3", "1"])
+        self.assertEqual(history["s1"], self.inventory.get_student_c_test_history("s1"))
+        self.assertEqual(history["s2"][0]["date"], "2024-05-02 00:00:00")
+        self.assertEqual(history["s3"], [])
+        self.assertEqual(self.inventory.get_c_test_history_bulk([]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()